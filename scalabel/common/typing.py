@@ -7,6 +7,7 @@ import numpy.typing as npt
 
 DictStrAny = Dict[str, Any]  # type: ignore[misc]
 
+NDArrayBool = npt.NDArray[np.bool_]
 NDArrayF64 = npt.NDArray[np.float64]
 NDArrayI32 = npt.NDArray[np.int32]
 NDArrayU8 = npt.NDArray[np.uint8]
@@ -1,30 +1,52 @@
 """Test cases for mot.py."""
 import os
 import unittest
+from typing import List
 
 import numpy as np
+from pandas import DataFrame
 
 from ..label.io import group_and_sort, load, load_label_config
+from ..label.typing import Config, Frame
 from ..unittest.util import get_test_file
-from .mot import acc_single_video_mot, evaluate_track
+from .mot import BoxTrackResult, acc_single_video_mot, evaluate_track
+from .result import Scores
 
 
 class TestBDD100KMotEval(unittest.TestCase):
     """Test cases for BDD100K MOT evaluation."""
 
     cur_dir = os.path.dirname(os.path.abspath(__file__))
-    gts = group_and_sort(
-        load("{}/testcases/track_sample_anns.json".format(cur_dir)).frames
-    )
-    preds = group_and_sort(
-        load("{}/testcases/track_predictions.json".format(cur_dir)).frames
-    )
-    config = load_label_config(get_test_file("box_track_configs.toml"))
-    result = evaluate_track(acc_single_video_mot, gts, preds, config)
+    gts: List[List[Frame]]
+    preds: List[List[Frame]]
+    config: Config
+    result: BoxTrackResult
+    data_frame: DataFrame
+    summary: Scores
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Run the evaluation once for all the test cases."""
+        cls.gts = group_and_sort(
+            load(
+                "{}/testcases/track_sample_anns.json".format(cls.cur_dir)
+            ).frames
+        )
+        cls.preds = group_and_sort(
+            load(
+                "{}/testcases/track_predictions.json".format(cls.cur_dir)
+            ).frames
+        )
+        cls.config = load_label_config(get_test_file("box_track_configs.toml"))
+        cls.result = evaluate_track(
+            acc_single_video_mot, cls.gts, cls.preds, cls.config
+        )
+        cls.data_frame = cls.result.pd_frame()
+        cls.summary = cls.result.summary()
 
     def test_frame(self) -> None:
         """Test case for the function frame()."""
-        data_frame = self.result.pd_frame()
+        data_frame = self.data_frame
         categories = set(
             [
                 "human",
@@ -84,7 +106,7 @@ class TestBDD100KMotEval(unittest.TestCase):
 
     def test_summary(self) -> None:
         """Check evaluation scores' correctness."""
-        summary = self.result.summary()
+        summary = self.summary
         overall_reference = {
             "IDF1": 71.01073676416142,
             "MOTA": 64.20070762302991,
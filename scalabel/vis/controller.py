@@ -5,7 +5,7 @@ import os
 from dataclasses import dataclass
 from queue import Queue
 from threading import Timer
-from typing import TYPE_CHECKING, Dict, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
 
 import matplotlib.pyplot as plt
 from matplotlib.backend_bases import Event
@@ -118,7 +118,7 @@ class ViewController:
     Keymap:
     -  n / p: Show next or previous image
     -  Space: Start / stop animation
-    -  t: Toggle 2D / 3D bounding box (if avaliable)
+    -  t: Cycle through 2D + 3D / 2D / 3D bounding boxes (if avaliable)
     -  a: Toggle the display of the attribute tags on boxes or polygons.
     -  c: Toggle the display of polygon vertices.
     -  Up: Increase the size of polygon vertices.
@@ -160,32 +160,38 @@ class ViewController:
         self.queue: DisplayDataQueue = Queue()
 
     def run(self) -> None:
-        """Start the visualization."""
-        if self.config.out_dir is None:
-            plt.connect("key_release_event", self.key_press)
-            self.update()
-            plt.show()
-        else:
-            os.makedirs(self.config.out_dir, exist_ok=True)
-            while self.frame_index < len(self.frames):
-                self.update(output=True)
-                self.frame_index += 1
+        """Start the interactive visualization.
+
+        Exporting to the output directory goes through output_data instead.
+        """
+        plt.connect("key_release_event", self.key_press)
+        self.update()
+        plt.show()
 
-    def update(self, output: bool = False) -> None:
+    def update(self) -> None:
         """Update display_cfg, and put viewer task to the queue."""
         frame = self.frames[self.frame_index % len(self.frames)]
         image = self.images[frame.name].result()
-        if not output:
-            self.queue.put(DisplayData(image, frame, self.display_cfg))
-            return
+        self.queue.put(DisplayData(image, frame, self.display_cfg))
+
+    def out_path(self, frame: Frame) -> str:
+        """Get the path to export the visualization of the frame."""
         assert self.config.out_dir is not None
-        out_path = os.path.join(
+        return os.path.join(
             self.config.out_dir, frame.name.replace(".jpg", ".png")
         )
-        plt.cla()
-        self.queue.put(
-            DisplayData(image, frame, self.display_cfg, out_path=out_path)
-        )
+
+    def output_data(self) -> Iterator[DisplayData]:
+        """Yield the display data to export for all the frames."""
+        assert self.config.out_dir is not None
+        os.makedirs(self.config.out_dir, exist_ok=True)
+        for frame in self.frames:
+            yield DisplayData(
+                self.images[frame.name].result(),
+                frame,
+                self.display_cfg,
+                out_path=self.out_path(frame),
+            )
 
     def key_press(self, event: Event) -> None:
         """Handel control keys."""
@@ -197,8 +203,15 @@ class ViewController:
             else:
                 self.frame_index -= 1
         elif event.key == "t":
-            self.display_cfg.with_box2d = not self.display_cfg.with_box2d
-            self.display_cfg.with_box3d = not self.display_cfg.with_box3d
+            # Cycle through 2D + 3D -> 2D -> 3D -> 2D + 3D boxes
+            if self.display_cfg.with_box2d and self.display_cfg.with_box3d:
+                self.display_cfg.with_box3d = False
+            elif self.display_cfg.with_box2d:
+                self.display_cfg.with_box2d = False
+                self.display_cfg.with_box3d = True
+            else:
+                self.display_cfg.with_box2d = True
+                self.display_cfg.with_box3d = True
         elif event.key == "space":
             if not self._run_animation:
                 self.start_animation()
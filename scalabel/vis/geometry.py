@@ -6,7 +6,7 @@ from typing import Dict, List, Tuple, Union
 
 import numpy as np
 
-from ..common.typing import NDArrayF64
+from ..common.typing import NDArrayBool, NDArrayF64
 from ..label.typing import Box3D
 
 
@@ -44,6 +44,75 @@ def vector_3d_to_2d(
     return [vec_2d[0] / vec_2d[2], vec_2d[1] / vec_2d[2]]
 
 
+def get_box3d_corners(box3ds: List[Box3D]) -> NDArrayF64:
+    """Get the 8 corners of each 3D bounding box as an (N, 8, 3) array.
+
+    The corners are in the same order and rotated in the same way as the
+    vertices of Label3d.from_box3d.
+    """
+    centers = np.array([box3d.location for box3d in box3ds]).reshape(-1, 3)
+    # dimension is (height, width, length), along the y, z and x axes
+    dims = np.array([box3d.dimension for box3d in box3ds]).reshape(-1, 3)
+    half_sizes = dims[:, [2, 0, 1]] / 2
+    signs = np.array(
+        [[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)],
+        dtype=np.float64,
+    )
+    offsets = signs[None, :, :] * half_sizes[:, None, :]
+
+    # Rotate around y, then z, then x, as in rotate_vector
+    rot_x, rot_y, rot_z = (
+        np.array([box3d.orientation for box3d in box3ds]).reshape(-1, 3).T
+    )
+    zeros, ones = np.zeros_like(rot_x), np.ones_like(rot_x)
+    cos_x, sin_x = np.cos(rot_x), np.sin(rot_x)
+    cos_y, sin_y = np.cos(rot_y), np.sin(rot_y)
+    cos_z, sin_z = np.cos(rot_z), np.sin(rot_z)
+    mat_x = np.stack(
+        [ones, zeros, zeros, zeros, cos_x, -sin_x, zeros, sin_x, cos_x], -1
+    ).reshape(-1, 3, 3)
+    mat_y = np.stack(
+        [cos_y, zeros, sin_y, zeros, ones, zeros, -sin_y, zeros, cos_y], -1
+    ).reshape(-1, 3, 3)
+    mat_z = np.stack(
+        [cos_z, -sin_z, zeros, sin_z, cos_z, zeros, zeros, zeros, ones], -1
+    ).reshape(-1, 3, 3)
+    rotation = mat_x @ mat_z @ mat_y
+    rotated = offsets @ rotation.transpose(0, 2, 1)
+    corners: NDArrayF64 = centers[:, None, :] + rotated
+    return corners
+
+
+def check_box3ds_in_view(
+    box3ds: List[Box3D],
+    calibration: NDArrayF64,
+    x_range: Tuple[float, float],
+    y_range: Tuple[float, float],
+) -> NDArrayBool:
+    """Check whether the projection of each 3D box may overlap the view.
+
+    A box is out of view if it is entirely behind the camera, or if it is in
+    front of the camera and the bounding box of its projected corners does
+    not overlap the view. Boxes crossing the image plane are kept.
+    """
+    corners = get_box3d_corners(box3ds)
+    projected = corners @ calibration.T
+    depths = projected[..., 2]
+    in_front = depths > 0
+    all_in_front = in_front.all(axis=1)
+    points = projected[..., :2] / np.where(in_front, depths, 1)[..., None]
+    x_min, y_min = points.min(axis=1).T
+    x_max, y_max = points.max(axis=1).T
+    overlaps = (
+        (x_min < max(x_range))
+        & (x_max > min(x_range))
+        & (y_min < max(y_range))
+        & (y_max > min(y_range))
+    )
+    in_view: NDArrayBool = in_front.any(axis=1) & (~all_in_front | overlaps)
+    return in_view
+
+
 def check_side_of_line(
     point: NDArrayF64, line: Tuple[NDArrayF64, NDArrayF64]
 ) -> int:
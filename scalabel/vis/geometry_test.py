@@ -0,0 +1,66 @@
+"""Test cases for geometry.py."""
+import unittest
+from typing import Tuple
+
+import numpy as np
+
+from ..label.typing import Box3D
+from .geometry import Label3d, check_box3ds_in_view, get_box3d_corners
+
+CALIBRATION = np.array(
+    [[700.0, 0.0, 640.0], [0.0, 700.0, 360.0], [0.0, 0.0, 1.0]]
+)
+X_RANGE = (-0.5, 1279.5)
+Y_RANGE = (-0.5, 719.5)
+
+
+def make_box3d(
+    location: Tuple[float, float, float],
+    orientation: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+    dimension: Tuple[float, float, float] = (1.5, 1.8, 4.0),
+) -> Box3D:
+    """Make a Box3D with the given location."""
+    return Box3D(
+        alpha=0.0,
+        orientation=orientation,
+        location=location,
+        dimension=dimension,
+    )
+
+
+class TestBox3DGeometry(unittest.TestCase):
+    """Test cases for the batched 3D box functions."""
+
+    def test_get_box3d_corners(self) -> None:
+        """Check the corners against Label3d.from_box3d."""
+        rng = np.random.default_rng(0)
+        box3ds = [
+            make_box3d(
+                tuple(rng.uniform(-10, 10, 3)),
+                tuple(rng.uniform(-np.pi, np.pi, 3)),
+                tuple(rng.uniform(1, 5, 3)),
+            )
+            for _ in range(10)
+        ]
+        corners = get_box3d_corners(box3ds)
+        self.assertEqual(corners.shape, (10, 8, 3))
+        for box3d, box_corners in zip(box3ds, corners):
+            vertices = np.array(Label3d.from_box3d(box3d).vertices)
+            np.testing.assert_array_almost_equal(box_corners, vertices)
+
+        self.assertEqual(get_box3d_corners([]).shape, (0, 8, 3))
+
+    def test_check_box3ds_in_view(self) -> None:
+        """Check the view test for boxes around the camera."""
+        box3ds = [
+            # in front of the camera and in the image
+            make_box3d((0.0, 1.0, 10.0)),
+            # behind the camera
+            make_box3d((0.0, 1.0, -10.0)),
+            # in front of the camera, but projected off the image
+            make_box3d((100.0, 1.0, 10.0)),
+            # crossing the image plane
+            make_box3d((0.0, 1.0, 0.5)),
+        ]
+        in_view = check_box3ds_in_view(box3ds, CALIBRATION, X_RANGE, Y_RANGE)
+        self.assertListEqual(in_view.tolist(), [True, False, False, True])
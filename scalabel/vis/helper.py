@@ -3,6 +3,7 @@ import copy
 import io
 import os
 import urllib.request
+import zlib
 from typing import List, Optional, Tuple
 
 import matplotlib.patches as mpatches
@@ -22,6 +23,13 @@ def random_color() -> NDArrayF64:
     return np.array(np.random.rand(3))
 
 
+def label_color(label_id: str) -> List[float]:
+    """Generate a color (RGB) that is always the same for the label id."""
+    rng = np.random.default_rng(zlib.crc32(label_id.encode()))
+    color: List[float] = rng.random(3).tolist()
+    return color
+
+
 # Function to fetch images
 def fetch_image(inputs: Tuple[Frame, str]) -> NDArrayU8:
     """Fetch the image given image information."""
@@ -127,7 +135,7 @@ def gen_3d_cube(
 def poly2patch(
     vertices: List[Tuple[float, float]],
     types: str,
-    color: Optional[NDArrayF64] = None,
+    color: Optional[List[float]] = None,
     linewidth: int = 2,
     alpha: float = 1.0,
     closed: bool = False,
@@ -143,7 +151,7 @@ def poly2patch(
         codes.append(Path.LINETO)
 
     if color is None:
-        color = random_color()
+        color = random_color().tolist()
 
     return mpatches.PathPatch(
         Path(points, codes),
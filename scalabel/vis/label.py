@@ -8,24 +8,31 @@ import concurrent.futures
 import io
 import threading
 from dataclasses import dataclass
+from itertools import chain
 from queue import Queue
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.figure import Figure
 from matplotlib.font_manager import FontProperties
+from matplotlib.image import AxesImage
+from PIL import Image
 
 from ..common.logger import logger
-from ..common.parallel import NPROC
+from ..common.parallel import NPROC, pmap
 from ..common.typing import NDArrayF64, NDArrayU8
-from ..label.typing import Frame, Intrinsics, Label
+from ..label.typing import Box3D, Frame, Intrinsics, Label
 from ..label.utils import (
     check_crowd,
     check_ignored,
     check_occluded,
     check_truncated,
+    get_matrix_from_intrinsics,
 )
 from .controller import (
     ControllerConfig,
@@ -33,7 +40,8 @@ from .controller import (
     DisplayData,
     ViewController,
 )
-from .helper import gen_2d_rect, gen_3d_cube, poly2patch, random_color
+from .geometry import check_box3ds_in_view
+from .helper import gen_2d_rect, gen_3d_cube, label_color, poly2patch
 
 # Necessary due to Queue being generic in stubs but not at runtime
 # https://mypy.readthedocs.io/en/stable/runtime_troubles.html#not-generic-runtime
@@ -52,6 +60,11 @@ class UIConfig:
     height: int
     width: int
     scale: float
+    # sizes derived from the scale, fixed for all the frames
+    scaled_height: float
+    scaled_width: float
+    line_width: int
+    tag_fontsize: int
     dpi: int = 80
     font: FontProperties = FontProperties(
         family=["sans-serif", "monospace"], weight="bold", size=18
@@ -72,6 +85,10 @@ class UIConfig:
         self.height = height
         self.width = width
         self.scale = scale
+        self.scaled_height = height * scale
+        self.scaled_width = width * scale
+        self.line_width = int(2 * scale)
+        self.tag_fontsize = int(10 * scale)
         self.dpi = dpi
         self.font.set_size(int(18 * scale))
         self.font.set_weight(weight)
@@ -87,8 +104,12 @@ class LabelViewer:
     High-level APIs:
         draw(image: np.array, frame: scalabel.label.typing.Frame):
             Draw the image with the labels stored in the 'frame'.
+        draw_data(data: DisplayData): draw the image and labels of the data
+            with its display config.
         show(): display the visualization of the current image.
         save(out_path: str): save the visualization of the current image.
+        save_to_buffer(buf: io.BytesIO): save the visualization as PNG to the
+            buffer.
 
     Middle-level APIs:
         draw_image(image: np.array): plot the current image
@@ -103,23 +124,52 @@ class LabelViewer:
     def __init__(
         self,
         ui_cfg: UIConfig = UIConfig(),
+        with_pyplot: bool = True,
     ) -> None:
-        """Initialize the label viewer."""
+        """Initialize the label viewer.
+
+        Without pyplot, the figure is drawn on its own Agg canvas, which works
+        under any pyplot backend but cannot be shown.
+        """
         self.ui_cfg = ui_cfg
 
         # animation
-        self._label_colors: Dict[str, NDArrayF64] = {}
+        # colors are kept as lists, which is what the patches take
+        self._label_colors: Dict[str, List[float]] = {}
+        # label tags waiting to be drawn: (x, y, text)
+        self._pending_texts: List[Tuple[float, float, str]] = []
+        # the image artist is reused across frames of the same shape
+        self._image: Optional[AxesImage] = None
+        self._image_shape: Tuple[int, ...] = ()
+        self._image_pre_scaled = False
 
         figsize = (
-            int(self.ui_cfg.width * self.ui_cfg.scale // self.ui_cfg.dpi),
-            int(self.ui_cfg.height * self.ui_cfg.scale // self.ui_cfg.dpi),
+            int(self.ui_cfg.scaled_width // self.ui_cfg.dpi),
+            int(self.ui_cfg.scaled_height // self.ui_cfg.dpi),
+        )
+        if with_pyplot:
+            self.fig = plt.figure(figsize=figsize, dpi=self.ui_cfg.dpi)
+        else:
+            self.fig = Figure(figsize=figsize, dpi=self.ui_cfg.dpi)
+            FigureCanvasAgg(self.fig)
+        # figure size in pixels: (width, height)
+        self._fig_size = (
+            figsize[0] * self.ui_cfg.dpi,
+            figsize[1] * self.ui_cfg.dpi,
         )
-        self.fig = plt.figure(figsize=figsize, dpi=self.ui_cfg.dpi)
         self.ax: Axes = self.fig.add_axes([0.0, 0.0, 1.0, 1.0], frameon=False)
         self.ax.axis("off")
 
     def run_with_controller(self, controller: ViewController) -> None:
         """Start running with the controller."""
+        if controller.config.out_dir is not None:
+            # Export the frames in parallel, each process with its own viewer
+            pmap(
+                save_frame,
+                ((self.ui_cfg, data) for data in controller.output_data()),
+                controller.config.nproc,
+            )
+            return
         threading.Thread(target=self._worker, args=(controller.queue,)).start()
         controller.run()
 
@@ -127,19 +177,55 @@ class LabelViewer:
         """Worker to collaborate with the controller."""
         while True:
             data: DisplayData = queue.get()
-            self.draw(data.image, data.frame)
-            if data.out_path:
-                self.save(data.out_path)
-            else:
-                plt.draw()
+            self.draw_data(data)
+            # Leave the redraw to the GUI thread
+            self.fig.canvas.draw_idle()
 
     def show(self) -> None:  # pylint: disable=no-self-use
         """Show the visualization."""
         plt.show()
 
-    def save(self, out_path: str) -> None:  # pylint: disable=no-self-use
+    def save(self, out_path: str) -> None:
         """Save the visualization."""
-        plt.savefig(out_path, dpi=self.ui_cfg.dpi)
+        if out_path.lower().endswith(".png"):
+            self._print_png(out_path)
+        else:
+            self.fig.savefig(out_path, dpi=self.ui_cfg.dpi)
+
+    def save_to_buffer(self, buf: io.BytesIO) -> None:
+        """Save the visualization to the buffer as PNG."""
+        self._print_png(buf)
+
+    def _print_png(self, target: Union[str, io.BytesIO]) -> None:
+        """Encode the figure as PNG with the Agg canvas if possible.
+
+        The figure DPI is fixed at construction, so the plain Agg canvas is
+        printed directly without going through savefig. GUI canvases may
+        scale the figure DPI by the device pixel ratio, so they use savefig.
+        """
+        canvas = self.fig.canvas
+        if (
+            canvas.__class__ is FigureCanvasAgg
+            and self.fig.dpi == self.ui_cfg.dpi
+        ):
+            canvas.print_png(target)
+        else:
+            self.fig.savefig(target, format="png", dpi=self.ui_cfg.dpi)
+
+    def draw_data(self, data: DisplayData) -> None:
+        """Display the image and labels with the display config of the data."""
+        display_cfg = data.display_cfg
+        self.draw(
+            data.image,
+            data.frame,
+            with_attr=display_cfg.with_attr,
+            with_box2d=display_cfg.with_box2d,
+            with_box3d=display_cfg.with_box3d,
+            with_poly2d=display_cfg.with_poly2d,
+            with_ctrl_points=display_cfg.with_ctrl_points,
+            with_tags=display_cfg.with_tags,
+            ctrl_point_size=display_cfg.ctrl_point_size,
+        )
 
     def draw(
         self,
@@ -154,7 +240,8 @@ class LabelViewer:
         ctrl_point_size: float = 2.0,
     ) -> None:
         """Display the image and corresponding labels."""
-        plt.cla()
+        self._clear_labels()
+        self._pending_texts.clear()
         self.draw_image(image, frame.name)
         if frame.labels is None or len(frame.labels) == 0:
             logger.info("No labels found")
@@ -177,34 +264,75 @@ class LabelViewer:
 
     def draw_image(self, img: NDArrayU8, title: Optional[str] = None) -> None:
         """Draw image."""
-        if title is not None:
-            self.fig.canvas.manager.set_window_title(title)
-        self.ax.imshow(img, interpolation="bilinear", aspect="auto")
+        manager = self.fig.canvas.manager
+        if title is not None and manager is not None:
+            manager.set_window_title(title)
+        img_shape = img.shape
+        height, width = img_shape[:2]
+        # For export, resize the image to the figure size once here, so that
+        # matplotlib does not need to resample it when saving. Interactive
+        # canvases can zoom and resize, so they keep the full image.
+        pre_scale = self.fig.canvas.__class__ is FigureCanvasAgg
+        fig_width, fig_height = self._fig_size
+        if pre_scale and (height, width) != (fig_height, fig_width):
+            img = np.asarray(
+                Image.fromarray(img).resize((fig_width, fig_height))
+            )
+        # Only create a new image artist if the shape changes
+        if (
+            self._image is not None
+            and self._image in self.ax.images
+            and self._image_shape == img_shape
+            and self._image_pre_scaled == pre_scale
+        ):
+            self._image.set_data(img)
+            return
+        if self._image is not None and self._image in self.ax.images:
+            self._image.remove()
+        # Keep the original image size as the extent, which is the coordinate
+        # system of the labels.
+        self._image = self.ax.imshow(
+            img,
+            interpolation="nearest" if pre_scale else "bilinear",
+            aspect="auto",
+            extent=(-0.5, width - 0.5, height - 0.5, -0.5),
+        )
+        self._image_shape = img_shape
+        self._image_pre_scaled = pre_scale
+
+    def _clear_labels(self) -> None:
+        """Remove all the drawn artists except the image."""
+        for artist in list(
+            chain(
+                self.ax.collections,
+                self.ax.patches,
+                self.ax.lines,
+                self.ax.texts,
+            )
+        ):
+            artist.remove()
 
-    def _get_label_color(self, label: Label) -> NDArrayF64:
-        """Get color by id (if not found, then create a random color)."""
-        label_id = label.id
-        if label_id not in self._label_colors:
-            self._label_colors[label_id] = random_color()
-        return self._label_colors[label_id]
+    def _get_label_color(self, label: Label) -> List[float]:
+        """Get color by id (if not found, then create one from the id)."""
+        color = self._label_colors.get(label.id)
+        if color is None:
+            color = self._label_colors[label.id] = label_color(label.id)
+        return color
 
     def draw_attributes(self, frame: Frame) -> None:
         """Visualize attribute infomation of a frame."""
         if frame.attributes is None or len(frame.attributes) == 0:
             return
         attributes = frame.attributes
-        key_width = 0
-        for k, _ in attributes.items():
-            if len(k) > key_width:
-                key_width = len(k)
-        attr_tag = io.StringIO()
-        for k, v in attributes.items():
-            attr_tag.write("{}: {}\n".format(k.rjust(key_width, " "), v))
-        attr_tag.seek(0)
+        key_width = max(map(len, attributes))
+        attr_tag = "\n".join(
+            "{}: {}".format(k.rjust(key_width, " "), v)
+            for k, v in attributes.items()
+        )
         self.ax.text(
             25,
             90,
-            attr_tag.read()[:-1],
+            attr_tag,
             fontproperties=self.ui_cfg.font,
             color="red",
             bbox={"facecolor": "white", "alpha": 0.4, "pad": 10, "lw": 0},
@@ -229,28 +357,30 @@ class LabelViewer:
             text += ",i"
         if label.score is not None:
             text += "{:.2f}".format(label.score)
-        self.ax.text(
-            x_coord,
-            y_coord,
-            text,
-            fontsize=int(10 * self.ui_cfg.scale),
-            bbox={
+        self._pending_texts.append((x_coord, y_coord, text))
+
+    def _draw_pending_texts(self) -> None:
+        """Draw the queued label tags with the shared text style."""
+        text_kwargs = {
+            "fontsize": self.ui_cfg.tag_fontsize,
+            "bbox": {
                 "facecolor": "white",
                 "edgecolor": "none",
                 "alpha": 0.5,
                 "boxstyle": "square,pad=0.1",
             },
-        )
+        }
+        for x_coord, y_coord, text in self._pending_texts:
+            self.ax.text(x_coord, y_coord, text, **text_kwargs)
+        self._pending_texts.clear()
 
     def draw_box2ds(self, labels: List[Label], with_tags: bool = True) -> None:
         """Draw Box2d on the axes."""
+        rects: List[mpatches.Rectangle] = []
         for label in labels:
             if label.box2d is not None:
-                color = self._get_label_color(label).tolist()
-                for result in gen_2d_rect(
-                    label, color, int(2 * self.ui_cfg.scale)
-                ):
-                    self.ax.add_patch(result)
+                color = self._get_label_color(label)
+                rects.extend(gen_2d_rect(label, color, self.ui_cfg.line_width))
 
                 if with_tags:
                     self._draw_label_attributes(
@@ -258,6 +388,10 @@ class LabelViewer:
                         label.box2d.x1,
                         (label.box2d.y1 - 4),
                     )
+        # Add all the boxes in one collection, keeping their own styles
+        if rects:
+            self.ax.add_collection(PatchCollection(rects, match_original=True))
+        self._draw_pending_texts()
 
     def draw_box3ds(
         self,
@@ -266,22 +400,43 @@ class LabelViewer:
         with_tags: bool = True,
     ) -> None:
         """Draw Box3d on the axes."""
+        box3d_labels: List[Label] = []
+        box3ds: List[Box3D] = []
         for label in labels:
             if label.box3d is not None:
-                color = self._get_label_color(label).tolist()
-                occluded = check_occluded(label)
-                alpha = 0.5 if occluded else 0.8
-                for result in gen_3d_cube(
-                    label, color, int(2 * self.ui_cfg.scale), intrinsics, alpha
-                ):
-                    self.ax.add_patch(result)
-
-                if with_tags and label.box2d is not None:
-                    self._draw_label_attributes(
-                        label,
-                        label.box2d.x1,
-                        (label.box2d.y1 - 4),
-                    )
+                box3d_labels.append(label)
+                box3ds.append(label.box3d)
+        if not box3d_labels:
+            return
+        if self._image_shape:
+            # Skip the boxes projected out of the drawn image
+            height, width = self._image_shape[:2]
+            in_view = check_box3ds_in_view(
+                box3ds,
+                get_matrix_from_intrinsics(intrinsics),
+                (-0.5, width - 0.5),
+                (-0.5, height - 0.5),
+            ).tolist()
+        else:
+            in_view = [True] * len(box3d_labels)
+        for label, visible in zip(box3d_labels, in_view):
+            if not visible:
+                continue
+            color = self._get_label_color(label)
+            occluded = check_occluded(label)
+            alpha = 0.5 if occluded else 0.8
+            for result in gen_3d_cube(
+                label, color, self.ui_cfg.line_width, intrinsics, alpha
+            ):
+                self.ax.add_patch(result)
+
+            if with_tags and label.box2d is not None:
+                self._draw_label_attributes(
+                    label,
+                    label.box2d.x1,
+                    (label.box2d.y1 - 4),
+                )
+        self._draw_pending_texts()
 
     def draw_poly2ds(
         self,
@@ -293,14 +448,15 @@ class LabelViewer:
     ) -> None:
         """Draw poly2d labels not in 'lane' and 'drivable' categories."""
         for label in labels:
-            if label.poly2d is None:
+            if not label.poly2d:
                 continue
             color = self._get_label_color(label)
 
-            # Record the tightest bounding box
-            x1, x2 = self.ui_cfg.width * self.ui_cfg.scale, 0.0
-            y1, y2 = self.ui_cfg.height * self.ui_cfg.scale, 0.0
+            # Convert each polygon to an array once and reuse it below
+            poly_vertices: List[NDArrayF64] = []
             for poly in label.poly2d:
+                vertices = np.asarray(poly.vertices, dtype=np.float64)
+                poly_vertices.append(vertices)
                 patch = poly2patch(
                     poly.vertices,
                     poly.types,
@@ -312,18 +468,17 @@ class LabelViewer:
 
                 if with_ctrl_points:
                     self._draw_ctrl_points(
-                        poly.vertices,
+                        vertices,
                         poly.types,
                         color,
                         alpha,
                         ctrl_point_size,
                     )
 
-                patch_vertices = np.array(poly.vertices)
-                x1 = min(np.min(patch_vertices[:, 0]), x1)
-                y1 = min(np.min(patch_vertices[:, 1]), y1)
-                x2 = max(np.max(patch_vertices[:, 0]), x2)
-                y2 = max(np.max(patch_vertices[:, 1]), y2)
+            # Record the tightest bounding box over all the polygons
+            all_vertices = np.concatenate(poly_vertices, axis=0)
+            x1, y1 = all_vertices.min(axis=0)
+            x2, _ = all_vertices.max(axis=0)
 
             # Show attributes
             if with_tags:
@@ -332,81 +487,82 @@ class LabelViewer:
                     x1 + (x2 - x1) * 0.4,
                     y1 - 3.5,
                 )
+        self._draw_pending_texts()
 
     def _draw_ctrl_points(
         self,
-        vertices: List[Tuple[float, float]],
+        vertices: NDArrayF64,
         types: str,
-        color: NDArrayF64,
+        color: List[float],
         alpha: float,
         ctrl_point_size: float = 2.0,
     ) -> None:
-        """Draw the polygon vertices / control points."""
-        for idx, vert_data in enumerate(zip(vertices, types)):
-            vert = vert_data[0]
-            vert_type = vert_data[1]
-
-            # Add the point first
-            self.ax.add_patch(
-                mpatches.Circle(
-                    vert,
-                    ctrl_point_size,
-                    alpha=alpha,
-                    color=color,
-                )
+        """Draw the polygon vertices / control points.
+
+        The vertices are given as an (N, 2) array. All the points and all the
+        dashed edges are added as one collection each.
+        """
+        # Only use the vertices with a type, as zip would
+        num_vertices = min(len(vertices), len(types))
+        vertices = vertices[:num_vertices]
+        types = types[:num_vertices]
+
+        # Add the points first
+        self.ax.add_collection(
+            PatchCollection(
+                [mpatches.Circle(vert, ctrl_point_size) for vert in vertices],
+                facecolor=color,
+                edgecolor=color,
+                alpha=alpha,
             )
-            # Draw the dashed line to the previous vertex.
-            if vert_type == "C":
-                if idx == 0:
-                    vert_prev = vertices[-1]
-                else:
-                    vert_prev = vertices[idx - 1]
-                edge = np.concatenate(
-                    [
-                        np.array(vert_prev)[None, ...],
-                        np.array(vert)[None, ...],
-                    ],
-                    axis=0,
-                )
-                self.ax.add_patch(
-                    mpatches.Polygon(
-                        edge,
-                        linewidth=int(2 * self.ui_cfg.scale),
-                        linestyle=(1, (1, 2)),
-                        edgecolor=color,
-                        facecolor="none",
-                        fill=False,
-                        alpha=alpha,
-                    )
-                )
+        )
 
-                # Draw the dashed line to the next vertex.
-                if idx == len(vertices) - 1:
-                    vert_next = vertices[0]
-                    type_next = types[0]
-                else:
-                    vert_next = vertices[idx + 1]
-                    type_next = types[idx + 1]
-
-                if type_next == "L":
-                    edge = np.concatenate(
-                        [
-                            np.array(vert_next)[None, ...],
-                            np.array(vert)[None, ...],
-                        ],
-                        axis=0,
-                    )
-                    self.ax.add_patch(
-                        mpatches.Polygon(
-                            edge,
-                            linewidth=int(2 * self.ui_cfg.scale),
-                            linestyle=(1, (1, 2)),
-                            edgecolor=color,
-                            facecolor="none",
-                            fill=False,
-                            alpha=alpha,
-                        )
-                    )
+        # Draw the dashed lines from each control point to the previous
+        # vertex, and to the next vertex if that one is a line vertex.
+        type_codes = np.frombuffer(types.encode("ascii"), dtype=np.uint8)
+        ctrl_idx = np.flatnonzero(type_codes == ord("C"))
+        if len(ctrl_idx) == 0:
+            return
+        # Index -1 wraps around to the last vertex.
+        prev_idx = ctrl_idx - 1
+        next_idx = (ctrl_idx + 1) % num_vertices
+        next_line = type_codes[next_idx] == ord("L")
+        edges = np.concatenate(
+            [
+                np.stack((vertices[prev_idx], vertices[ctrl_idx]), axis=1),
+                np.stack(
+                    (
+                        vertices[next_idx[next_line]],
+                        vertices[ctrl_idx[next_line]],
+                    ),
+                    axis=1,
+                ),
+            ],
+            axis=0,
+        )
+        self.ax.add_collection(
+            LineCollection(
+                edges,
+                linewidths=self.ui_cfg.line_width,
+                linestyles=[(1, (1, 2))],
+                colors=[color],
+                alpha=alpha,
+            )
+        )
+
+
+def save_frame(inputs: Tuple[UIConfig, DisplayData]) -> None:
+    """Draw and save one frame with a new viewer.
+
+    Used to export frames in worker processes, where figures cannot be shared.
+    The viewer does not go through pyplot, so this is safe whatever backend
+    pyplot uses.
+    """
+    ui_cfg, data = inputs
+    assert data.out_path is not None
+    viewer = LabelViewer(ui_cfg, with_pyplot=False)
+    viewer.draw_data(data)
+    viewer.save(data.out_path)
 
 
 def parse_args() -> argparse.Namespace:
@@ -416,7 +572,7 @@ def parse_args() -> argparse.Namespace:
 Interface keymap:
     -  n / p: Show next or previous image
     -  Space: Start / stop animation
-    -  t: Toggle 2D / 3D bounding box (if avaliable)
+    -  t: Cycle through 2D + 3D / 2D / 3D bounding boxes (if avaliable)
     -  a: Toggle the display of the attribute tags on boxes or polygons.
     -  c: Toggle the display of polygon vertices.
     -  Up: Increase the size of polygon vertices.
@@ -461,10 +617,16 @@ Export images:
         default=False,
         help="Do not show attributes",
     )
+    parser.add_argument(
+        "--no-box2d",
+        action="store_true",
+        default=False,
+        help="Do not show 2D bounding boxes",
+    )
     parser.add_argument(
         "--no-box3d",
         action="store_true",
-        default=True,
+        default=False,
         help="Do not show 3D bounding boxes",
     )
     parser.add_argument(
@@ -507,7 +669,7 @@ Export images:
         "--nproc",
         type=int,
         default=NPROC,
-        help="number of processes for json loading",
+        help="number of processes for json loading and image export",
     )
 
     args = parser.parse_args()
@@ -518,6 +680,9 @@ Export images:
 def main() -> None:
     """Main function."""
     args = parse_args()
+    if args.output_dir is not None:
+        # No window is needed for export, also in the forked processes
+        plt.switch_backend("agg")
     # Initialize the thread executor.
     with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
         ui_cfg = UIConfig(
@@ -527,7 +692,7 @@ def main() -> None:
         )
         display_cfg = DisplayConfig(
             with_attr=not args.no_attr,
-            with_box2d=args.no_box3d,
+            with_box2d=not args.no_box2d,
             with_box3d=not args.no_box3d,
             with_ctrl_points=not args.no_vertices,
             with_tags=not args.no_tags,
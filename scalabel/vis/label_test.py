@@ -0,0 +1,87 @@
+"""Test cases for label.py."""
+import io
+import os
+import tempfile
+import unittest
+from typing import List, Tuple
+
+import matplotlib
+import numpy as np
+from matplotlib.collections import LineCollection
+from PIL import Image
+
+from ..label.typing import Label
+from .label import LabelViewer, UIConfig
+
+matplotlib.use("agg")
+
+Segment = Tuple[Tuple[float, float], Tuple[float, float]]
+
+
+class TestLabelViewer(unittest.TestCase):
+    """Test cases for the label viewer."""
+
+    def _ctrl_edges(
+        self, vertices: List[Tuple[float, float]], types: str
+    ) -> List[Segment]:
+        """Draw the control points and return the dashed edges."""
+        viewer = LabelViewer()
+        viewer._draw_ctrl_points(  # pylint: disable=protected-access
+            np.array(vertices, dtype=np.float64), types, [1.0, 0.0, 0.0], 0.5
+        )
+        edges: List[Segment] = []
+        for collection in viewer.ax.collections:
+            if isinstance(collection, LineCollection):
+                for segment in collection.get_segments():
+                    (x1, y1), (x2, y2) = segment.tolist()
+                    edges.append(((x1, y1), (x2, y2)))
+        return sorted(edges)
+
+    def test_draw_ctrl_points(self) -> None:
+        """Check the dashed edges of the control points."""
+        vertices = [(0.0, 0.0), (1.0, 0.0), (2.0, 1.0), (3.0, 3.0)]
+        v0, v1, v2, v3 = vertices
+
+        # Edges to the previous vertex, and to the next one if it is a line
+        self.assertListEqual(
+            self._ctrl_edges(vertices, "LCCL"),
+            sorted([(v0, v1), (v1, v2), (v3, v2)]),
+        )
+        # Wrap around at the first and the last vertex
+        self.assertListEqual(
+            self._ctrl_edges(vertices, "CLLC"),
+            sorted([(v3, v0), (v1, v0), (v2, v3)]),
+        )
+        # Vertices without a type are ignored
+        self.assertListEqual(
+            self._ctrl_edges(vertices + [(5.0, 5.0)], "LCL"),
+            sorted([(v0, v1), (v2, v1)]),
+        )
+        self.assertListEqual(self._ctrl_edges(vertices, "LLLL"), [])
+
+    def test_label_color(self) -> None:
+        """Check that the colors only depend on the label ids."""
+        # pylint: disable=protected-access
+        viewer1, viewer2 = LabelViewer(), LabelViewer()
+        label1, label2 = Label(id="a"), Label(id="b")
+        color1 = viewer1._get_label_color(label1)
+        viewer2._get_label_color(label2)
+        self.assertListEqual(viewer2._get_label_color(label1), color1)
+        self.assertNotEqual(viewer1._get_label_color(label2), color1)
+
+    def test_save(self) -> None:
+        """Check the pixel size of the saved PNG images."""
+        image = np.zeros((720, 1280, 3), dtype=np.uint8)
+        for with_pyplot in [True, False]:
+            viewer = LabelViewer(UIConfig(), with_pyplot=with_pyplot)
+            viewer.draw_image(image)
+
+            buf = io.BytesIO()
+            viewer.save_to_buffer(buf)
+            buf.seek(0)
+            self.assertEqual(Image.open(buf).size, (1280, 720))
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                out_path = os.path.join(tmp_dir, "frame.png")
+                viewer.save(out_path)
+                self.assertEqual(Image.open(out_path).size, (1280, 720))